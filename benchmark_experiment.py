@@ -0,0 +1,227 @@
+"""Benchmarks for the Experiment lifecycle.
+
+Times `Experiment.from_parser`, `summary`, `finish`, the stdout/stderr tee and the cold start of a one-shot script
+while varying the number of runs already present in the experiments directory, the size of the git repository and
+the number of lines printed.
+Each scenario runs inside a scratch repository so the numbers don't depend on the state of this checkout.
+
+Run from the root of this repository:
+
+    python benchmark_experiment.py --output bench.json
+    python benchmark_experiment.py --output bench_new.json --compare bench.json
+
+Results are JSON, tagged with the meticulous commit under test so that runs against different commits can be
+compared.
+"""
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from importlib.metadata import distribution, PackageNotFoundError
+
+import meticulous
+from meticulous import Experiment
+from git import Repo, InvalidGitRepositoryError, NoSuchPathError
+
+try:
+    from .training_utils import build_training_parser
+    from .repo_utils import build_scratch_repo
+except ImportError:
+    # Run as a script
+    from training_utils import build_training_parser
+    from repo_utils import build_scratch_repo
+
+PHASES = ['from_parser', 'summary', 'tee', 'finish', 'cold_start']
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def populate_experiments_directory(directory, n_runs):
+    """Fill `directory` with `n_runs` finished experiments that look like the ones meticulous writes."""
+    os.makedirs(directory, exist_ok=True)
+    args = vars(build_training_parser().parse_args([]))
+    args_text = json.dumps(args)
+    for i in range(1, n_runs + 1):
+        expdir = os.path.join(directory, str(i))
+        os.mkdir(expdir)
+        with open(os.path.join(expdir, 'args.json'), 'w') as f:
+            f.write(args_text)
+        with open(os.path.join(expdir, 'metadata.json'), 'w') as f:
+            json.dump({'start-time': datetime.datetime.now().isoformat(), 'description': ''}, f)
+        with open(os.path.join(expdir, 'STATUS'), 'w') as f:
+            f.write('SUCCESS\n')
+
+
+def time_lifecycle(parser, arg_list, print_lines):
+    """Run one experiment end to end and return the wall time of each phase in seconds."""
+    timings = {}
+    with open(os.devnull, 'w') as devnull, \
+            contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        start = time.perf_counter()
+        experiment = Experiment.from_parser(parser, arg_list)
+        timings['from_parser'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        experiment.summary({'val_loss': 0.5})
+        timings['summary'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(print_lines):
+            print('step {} loss {:.6f}'.format(i, 1.0 / (i + 1)))
+            if i % 10 == 0:
+                print('step {} warning'.format(i), file=sys.stderr)
+        sys.stdout.flush()
+        sys.stderr.flush()
+        timings['tee'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        experiment.finish()
+        timings['finish'] = time.perf_counter() - start
+    return timings
+
+
+def time_cold_start(arg_list):
+    """Wall time of a one-shot script that starts a fresh interpreter, imports meticulous and runs one experiment."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [TESTS_DIR, os.environ.get('PYTHONPATH')])))
+    start = time.perf_counter()
+    subprocess.run([sys.executable, os.path.join(TESTS_DIR, 'exit_testing_helper_success.py')]+arg_list,
+                   env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def run_scenario(workdir, n_runs, repo_files, print_lines, repeat):
+    """Benchmark one point of the scenario matrix, returning a list of result records."""
+    repo_dir = os.path.join(workdir, 'repo_{}'.format(repo_files))
+    if not os.path.exists(repo_dir):
+        os.makedirs(repo_dir)
+        build_scratch_repo(repo_dir, n_files=repo_files)
+    experiments_directory = os.path.join(repo_dir, 'experiments_{}_{}'.format(n_runs, print_lines))
+    shutil.rmtree(experiments_directory, ignore_errors=True)
+    populate_experiments_directory(experiments_directory, n_runs)
+
+    parser = build_training_parser()
+    Experiment.add_argument_group(parser)
+    arg_list = ['--dry-run', '--epochs', '1', '--experiments-directory', experiments_directory]
+
+    samples = {phase: [] for phase in PHASES}
+    cwd = os.getcwd()
+    os.chdir(repo_dir)
+    try:
+        for _ in range(repeat):
+            for phase, seconds in time_lifecycle(parser, arg_list, print_lines).items():
+                samples[phase].append(seconds)
+            samples['cold_start'].append(time_cold_start(arg_list))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(experiments_directory, ignore_errors=True)
+
+    scenario = {'existing-runs': n_runs, 'repo-files': repo_files, 'print-lines': print_lines}
+    return [{'scenario': scenario, 'phase': phase, 'samples': phase_samples,
+             'median': statistics.median(phase_samples), 'min': min(phase_samples)}
+            for phase, phase_samples in samples.items()]
+
+
+def scenarios(runs, repo_files, print_lines):
+    """Vary one axis at a time around the first value of each axis rather than taking the full cross product."""
+    base = (runs[0], repo_files[0], print_lines[0])
+    points = [base]
+    points += [(n, base[1], base[2]) for n in runs[1:]]
+    points += [(base[0], n, base[2]) for n in repo_files[1:]]
+    points += [(base[0], base[1], n) for n in print_lines[1:]]
+    return points
+
+
+def git_sha(path):
+    try:
+        return Repo(path, search_parent_directories=True).head.commit.hexsha
+    except (InvalidGitRepositoryError, NoSuchPathError, ValueError):
+        return None
+
+
+def meticulous_commit():
+    """Identify the meticulous build under test, from its checkout or from pip's record of where it came from."""
+    sha = git_sha(os.path.dirname(os.path.abspath(meticulous.__file__)))
+    if sha is None:
+        try:
+            direct_url = distribution('meticulous').read_text('direct_url.json')
+            if direct_url:
+                sha = json.loads(direct_url).get('vcs_info', {}).get('commit_id')
+        except (PackageNotFoundError, ValueError, OSError):
+            pass
+    return sha
+
+
+def environment():
+    return {
+        'meticulous-sha': meticulous_commit(),
+        'meticulous-version': getattr(meticulous, '__version__', None),
+        'tests-sha': git_sha(os.path.dirname(os.path.abspath(__file__))),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': datetime.datetime.now().isoformat(),
+    }
+
+
+def compare(results, baseline):
+    """Print the relative change of each median against a previous results file."""
+    key = lambda r: (json.dumps(r['scenario'], sort_keys=True), r['phase'])
+    old = {key(r): r['median'] for r in baseline['results']}
+    print('{:<60} {:>10} {:>10} {:>8}'.format('scenario / phase', 'old (ms)', 'new (ms)', 'change'))
+    for r in results['results']:
+        if key(r) not in old:
+            continue
+        before, after = old[key(r)], r['median']
+        change = (after - before) / before if before else float('nan')
+        label = '{} {}'.format(' '.join('{}={}'.format(k, v) for k, v in r['scenario'].items()), r['phase'])
+        print('{:<60} {:>10.2f} {:>10.2f} {:>+7.1%}'.format(label, before * 1e3, after * 1e3, change))
+
+
+def build_benchmark_parser():
+    parser = argparse.ArgumentParser(description='Benchmark the meticulous Experiment lifecycle')
+    parser.add_argument('--runs', type=int, nargs='+', default=[0, 1000, 50000],
+                        help='number of runs already in the experiments directory (default: 0 1000 50000)')
+    parser.add_argument('--repo-files', type=int, nargs='+', default=[100, 5000, 50000],
+                        help='number of files committed to the scratch repository (default: 100 5000 50000)')
+    parser.add_argument('--print-lines', type=int, nargs='+', default=[0, 1000, 100000],
+                        help='number of lines printed while the experiment is running (default: 0 1000 100000)')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='number of timed experiments per scenario (default: 5)')
+    parser.add_argument('--output', type=str, default=None,
+                        help='write the JSON results to this file instead of stdout')
+    parser.add_argument('--compare', type=str, default=None,
+                        help='JSON results of a previous run to compare against')
+    return parser
+
+
+def main(arg_list=None):
+    args = build_benchmark_parser().parse_args(arg_list)
+    workdir = tempfile.mkdtemp(prefix='meticulous_bench_')
+    try:
+        results = []
+        for n_runs, repo_files, print_lines in scenarios(args.runs, args.repo_files, args.print_lines):
+            results += run_scenario(workdir, n_runs, repo_files, print_lines, args.repeat)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    output = {'environment': environment(), 'results': results}
+
+    if args.output is None:
+        json.dump(output, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, 'w') as f:
+            json.dump(output, f, indent=2)
+    if args.compare is not None:
+        with open(args.compare, 'r') as f:
+            compare(output, json.load(f))
+    return output
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+import os
+import time
+from training_utils import build_training_parser
+from meticulous import Experiment
+
+def start_together():
+    # Every process announces it is ready and then waits for the go file, so that id allocation actually races
+    barrier_dir = os.environ['METICULOUS_TEST_BARRIER_DIR']
+    parser = build_training_parser()
+    Experiment.add_argument_group(parser)
+    open(os.path.join(barrier_dir, 'ready_{}'.format(os.getpid())), 'w').close()
+    while not os.path.exists(os.path.join(barrier_dir, 'go')):
+        time.sleep(0.001)
+    experiment = Experiment.from_parser(parser)
+    experiment.finish()
+
+if __name__ == '__main__':
+    start_together()
@@ -0,0 +1,21 @@
+from training_utils import build_training_parser
+from meticulous import Experiment
+import sys
+
+N_LINES = 5000
+
+def chatty_exit(mode):
+    parser = build_training_parser()
+    Experiment.add_argument_group(parser)
+    experiment = Experiment.from_parser(parser)
+    for i in range(N_LINES):
+        print('stdout line {}'.format(i))
+        print('stderr line {}'.format(i), file=sys.stderr)
+    if mode == 'exit':
+        sys.exit()
+    elif mode == 'exception':
+        raise Exception
+
+if __name__ == '__main__':
+    # The first argument selects how the program ends, the rest are passed on to the experiment
+    chatty_exit(sys.argv.pop(1))
@@ -1,12 +1,16 @@
-from training_utils import build_training_parser
+try:
+    from .training_utils import build_training_parser
+except ImportError:
+    # Run as a script
+    from training_utils import build_training_parser
 from meticulous import Experiment
 import time
-def raise_exception():
+def raise_exception(sleep=time.sleep):
     parser = build_training_parser()
     Experiment.add_argument_group(parser)
     with Experiment.from_parser(parser) as exp:
         raise Exception
-    time.sleep(2)
+    sleep(2)
     Experiment.from_parser(parser)
     raise Exception
 
@@ -1,4 +1,8 @@
-from training_utils import build_training_parser
+try:
+    from .training_utils import build_training_parser
+except ImportError:
+    # Run as a script
+    from training_utils import build_training_parser
 from meticulous import Experiment
 import sys
 
@@ -1,13 +1,17 @@
 import time
-from training_utils import build_training_parser
+try:
+    from .training_utils import build_training_parser
+except ImportError:
+    # Run as a script
+    from training_utils import build_training_parser
 from meticulous import Experiment
-def successful_exit():
+def successful_exit(sleep=time.sleep):
     parser = build_training_parser()
     Experiment.add_argument_group(parser)
     with Experiment.from_parser(parser) as exp:
         pass
     Experiment.from_parser(parser).finish()
     Experiment.from_parser(parser)
-    time.sleep(2)
+    sleep(2)
 if __name__ == '__main__':
     successful_exit()
\ No newline at end of file
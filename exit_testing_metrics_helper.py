@@ -0,0 +1,24 @@
+from training_utils import build_training_parser
+from meticulous import Experiment
+import os
+import sys
+import time
+
+N_STEPS = 1000
+
+def log_and_exit(mode):
+    parser = build_training_parser()
+    Experiment.add_argument_group(parser)
+    experiment = Experiment.from_parser(parser)
+    for step in range(N_STEPS):
+        experiment.log(step, loss=1.0/(step+1), accuracy=step/N_STEPS)
+    if mode == 'exception':
+        raise Exception
+    elif mode == 'crash':
+        # Give the periodic flush a chance to run, then die without any interpreter finalization
+        time.sleep(2)
+        os._exit(1)
+
+if __name__ == '__main__':
+    # The first argument selects how the program ends, the rest are passed on to the experiment
+    log_and_exit(sys.argv.pop(1))
@@ -0,0 +1,16 @@
+from training_utils import build_training_parser
+from meticulous import Experiment
+import time
+
+def hang():
+    # Logs a few steps and then never finishes; the test kills it with SIGKILL
+    parser = build_training_parser()
+    Experiment.add_argument_group(parser)
+    experiment = Experiment.from_parser(parser)
+    for step in range(5):
+        experiment.log(step, loss=1.0/(step+1))
+    while True:
+        time.sleep(1)
+
+if __name__ == '__main__':
+    hang()
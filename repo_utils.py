@@ -0,0 +1,33 @@
+import os
+from git import Repo
+
+
+def build_scratch_repo(path, n_files=10, file_size=64):
+    """Create a clean git repository at `path` with `n_files` committed files.
+
+    Experiments refuse to start in a dirty repository, so tests and benchmarks that need a repository of a
+    particular size (or one they are free to commit to) build it here instead of touching this one.
+    """
+    repo = Repo.init(path)
+    with repo.config_writer() as config:
+        config.set_value('user', 'name', 'meticulous-tests')
+        config.set_value('user', 'email', 'meticulous-tests@example.com')
+    with open(os.path.join(path, '.gitignore'), 'w') as f:
+        f.write('experiments*/\n')
+    for i in range(n_files):
+        subdir = os.path.join(path, 'src', str(i // 1000))
+        os.makedirs(subdir, exist_ok=True)
+        with open(os.path.join(subdir, 'file_{}.txt'.format(i)), 'w') as f:
+            f.write(('{} '.format(i) * file_size)[:file_size])
+    repo.git.add(A=True)
+    repo.git.commit('-m', 'Scratch repository with {} files'.format(n_files))
+    return repo
+
+
+def commit_file(repo, relative_path, content, message='Update file'):
+    """Write `content` to `relative_path` inside `repo` and commit it, returning the new commit."""
+    with open(os.path.join(repo.working_tree_dir, relative_path), 'w') as f:
+        f.write(content)
+    repo.git.add(relative_path)
+    repo.git.commit('-m', message)
+    return repo.commit()
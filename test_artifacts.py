@@ -0,0 +1,101 @@
+import unittest
+from .training_utils import build_training_parser
+from meticulous import Experiment
+from meticulous.artifacts import collect_garbage
+import filecmp
+import hashlib
+import mmap
+import os
+import shutil
+
+# ioctl that reflinks one file into another on Linux filesystems that support it (btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+def supports_reflink(directory):
+    """Whether files in `directory` can be reflinked, the accepted alternative to hardlinking artifacts"""
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    source, target = os.path.join(directory, '.reflink_source'), os.path.join(directory, '.reflink_target')
+    try:
+        with open(source, 'wb') as src, open(target, 'wb') as dst:
+            src.write(b'reflink probe')
+            src.flush()
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except OSError:
+        return False
+    finally:
+        for path in [source, target]:
+            if os.path.exists(path):
+                os.remove(path)
+
+class ArtifactTestCase(unittest.TestCase):
+    def setUp(self):
+        self.experiments_folder_id = os.path.join('temp_files', 'experiments_'+self.id())
+        self.original_args_list = ['--dry-run', '--epochs', '1', '--save-model']
+        self.meticulous_args_list = ['--experiments-directory', self.experiments_folder_id]
+        self.parser = build_training_parser()
+        Experiment.add_argument_group(self.parser)
+
+    def artifact_path(self, experiment, name):
+        return os.path.join(experiment.curexpdir, 'artifacts', name)
+
+    def test_round_trip(self):
+        with Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list) as experiment:
+            experiment.save_artifact('model.pt', b'model weights')
+            loaded = experiment.load_artifact('model.pt')
+            self.assertIsInstance(loaded, (mmap.mmap, memoryview))
+            self.assertEqual(bytes(loaded), b'model weights')
+
+    def test_large_file(self):
+        os.makedirs('temp_files', exist_ok=True)
+        source = os.path.join('temp_files', 'large_'+self.id())
+        digest = hashlib.sha256()
+        with open(source, 'wb') as f:
+            for i in range(64):
+                chunk = os.urandom(1 << 20)
+                digest.update(chunk)
+                f.write(chunk)
+        try:
+            with Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list) as experiment:
+                experiment.save_artifact('dataset.bin', source)
+                self.assertEqual(hashlib.sha256(experiment.load_artifact('dataset.bin')).hexdigest(), digest.hexdigest())
+        finally:
+            os.remove(source)
+
+    def test_dedupe(self):
+        with Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list) as experiment1:
+            experiment1.save_artifact('model.pt', b'shared weights')
+        with Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list) as experiment2:
+            experiment2.save_artifact('checkpoint.pt', b'shared weights')
+            experiment2.save_artifact('optimizer.pt', b'optimizer state')
+        self.assertTrue(filecmp.cmp(self.artifact_path(experiment1, 'model.pt'), self.artifact_path(experiment2, 'checkpoint.pt'), shallow=False))
+        # Identical blobs are hardlinked, or reflinked where the filesystem supports it, never plain-copied
+        if not os.path.samefile(self.artifact_path(experiment1, 'model.pt'), self.artifact_path(experiment2, 'checkpoint.pt')):
+            self.assertTrue(supports_reflink(self.experiments_folder_id),
+                            msg="Identical artifacts are neither hardlinked nor on a filesystem that supports reflinks")
+        self.assertFalse(filecmp.cmp(self.artifact_path(experiment2, 'optimizer.pt'), self.artifact_path(experiment2, 'checkpoint.pt'), shallow=False))
+        # Identical content is stored once, so once both experiments are gone only two blobs are left to collect
+        shutil.rmtree(experiment1.curexpdir)
+        shutil.rmtree(experiment2.curexpdir)
+        self.assertEqual(collect_garbage(self.experiments_folder_id), 2)
+
+    def test_garbage_collection(self):
+        with Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list) as experiment1:
+            experiment1.save_artifact('model.pt', b'shared weights')
+            experiment1.save_artifact('optimizer.pt', b'optimizer state')
+        with Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list) as experiment2:
+            experiment2.save_artifact('model.pt', b'shared weights')
+        self.assertEqual(collect_garbage(self.experiments_folder_id), 0)
+        shutil.rmtree(experiment1.curexpdir)
+        # Only the blob that no remaining experiment refers to is removed
+        self.assertEqual(collect_garbage(self.experiments_folder_id), 1)
+        self.assertEqual(bytes(experiment2.load_artifact('model.pt')), b'shared weights')
+        shutil.rmtree(experiment2.curexpdir)
+        self.assertEqual(collect_garbage(self.experiments_folder_id), 1)
+
+    def tearDown(self):
+        shutil.rmtree(self.experiments_folder_id)
+        pass
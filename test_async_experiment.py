@@ -0,0 +1,88 @@
+import unittest
+from .training_utils import build_training_parser
+import asyncio
+import datetime
+import json
+from meticulous import AsyncExperiment
+import os
+import shutil
+
+class AsyncExperimentTestCase(unittest.TestCase):
+    def setUp(self):
+        self.experiments_folder_id = os.path.join('temp_files', 'experiments_'+self.id())
+        self.original_args_list = ['--dry-run', '--epochs', '1', '--seed', '234']
+        self.meticulous_args_list = ['--experiments-directory', self.experiments_folder_id]
+        self.parser = build_training_parser()
+        self.args = vars(self.parser.parse_args(self.original_args_list))
+        AsyncExperiment.add_argument_group(self.parser)
+
+    def read_file(self, expid, name):
+        with open(os.path.join(self.experiments_folder_id, expid, name), 'r') as f:
+            return f.read()
+
+    def test_success(self):
+        async def run():
+            async with AsyncExperiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list) as experiment:
+                await experiment.summary({'val_loss': 0.25})
+        asyncio.run(run())
+        self.assertEqual(self.read_file('1', 'STATUS').splitlines()[0].strip(), 'SUCCESS')
+        self.assertDictEqual(json.loads(self.read_file('1', 'args.json')), self.args)
+        metadata = json.loads(self.read_file('1', 'metadata.json'))
+        self.assertIn('githead-sha', metadata)
+        start_time = datetime.datetime.strptime(metadata["start-time"], "%Y-%m-%dT%H:%M:%S.%f")
+        end_time = datetime.datetime.strptime(metadata["end-time"], "%Y-%m-%dT%H:%M:%S.%f")
+        self.assertLessEqual(start_time, end_time)
+
+    def test_exception(self):
+        async def run():
+            async with AsyncExperiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list) as experiment:
+                raise ValueError
+        with self.assertRaises(ValueError):
+            asyncio.run(run())
+        # Same STATUS as a synchronous context manager experiment that raised
+        lines = self.read_file('1', 'STATUS').splitlines()
+        self.assertEqual(lines[0].strip(), 'ERROR')
+        self.assertEqual(lines[1].strip(), 'Traceback (most recent call last):')
+        self.assertIn('end-time', json.loads(self.read_file('1', 'metadata.json')))
+
+    def test_concurrent_output(self):
+        n_experiments = 20
+        async def run(i):
+            async with AsyncExperiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list) as experiment:
+                for step in range(50):
+                    print('experiment {} step {}'.format(i, step))
+                    await asyncio.sleep(0)
+                await experiment.summary({'val_loss': i})
+            return os.path.basename(experiment.curexpdir)
+        async def run_all():
+            return await asyncio.gather(*[run(i) for i in range(n_experiments)])
+        expids = asyncio.run(run_all())
+        self.assertCountEqual(expids, [str(i) for i in range(1, n_experiments+1)])
+        # Each experiment captures only what its own task printed, in order
+        for i, expid in enumerate(expids):
+            self.assertEqual(self.read_file(expid, 'stdout').splitlines(),
+                             ['experiment {} step {}'.format(i, step) for step in range(50)])
+
+    def test_event_loop_not_blocked(self):
+        # A ticker keeps running while experiments are created and finished
+        async def ticker(ticks, stop):
+            while not stop.is_set():
+                ticks.append(asyncio.get_running_loop().time())
+                await asyncio.sleep(0.005)
+        async def run():
+            ticks, stop = [], asyncio.Event()
+            task = asyncio.create_task(ticker(ticks, stop))
+            for _ in range(5):
+                async with AsyncExperiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list) as experiment:
+                    await experiment.summary({'val_loss': 0.25})
+            stop.set()
+            await task
+            return ticks
+        ticks = asyncio.run(run())
+        # A fully blocking implementation starves the ticker altogether
+        self.assertGreaterEqual(len(ticks), 2, msg="The event loop was blocked for the whole run")
+        self.assertLess(max(b - a for a, b in zip(ticks, ticks[1:])), 0.1)
+
+    def tearDown(self):
+        shutil.rmtree(self.experiments_folder_id)
+        pass
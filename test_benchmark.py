@@ -0,0 +1,23 @@
+import unittest
+from . import benchmark_experiment
+import json
+import os
+import tempfile
+
+class BenchmarkSmokeTestCase(unittest.TestCase):
+    def test_smallest_run(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output_file = os.path.join(tmpdir, 'bench.json')
+            benchmark_experiment.main(['--runs', '0', '--repo-files', '1', '--print-lines', '0', '--repeat', '1',
+                                       '--output', output_file])
+            with open(output_file, 'r') as f:
+                output = json.load(f)
+        self.assertCountEqual(output['environment'].keys(),
+                              ['meticulous-sha', 'meticulous-version', 'tests-sha', 'python', 'platform', 'time'])
+        # meticulous-sha is None for builds installed from neither a checkout nor a VCS url, so only its presence is checked
+        self.assertEqual([result['phase'] for result in output['results']], benchmark_experiment.PHASES)
+        for result in output['results']:
+            self.assertEqual(result['scenario'], {'existing-runs': 0, 'repo-files': 1, 'print-lines': 0})
+            self.assertEqual(len(result['samples']), 1)
+            self.assertEqual(result['median'], result['samples'][0])
+            self.assertEqual(result['min'], result['samples'][0])
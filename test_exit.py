@@ -0,0 +1,152 @@
+import unittest
+import json
+from meticulous.testing import run_in_fork, FakeClock
+from . import exit_testing_helper_success, exit_testing_helper_exit, exit_testing_helper_exception
+from . import exit_testing_cm_helper_success, exit_testing_cm_helper_exit, exit_testing_cm_helper_exception
+import functools
+import os
+import shutil
+import datetime
+
+class EndTimeTestCase(unittest.TestCase):
+    # These tests run in a forked child because they test behaviour at program exit
+    def setUp(self):
+        self.experiments_folder_id = os.path.join('temp_files', 'experiments_' + self.id())
+        self.arg_list = ['--dry-run', '--epochs', '1', '--experiments-directory', self.experiments_folder_id]
+
+    def test_success(self):
+        run_in_fork(exit_testing_helper_success.successful_exit, self.arg_list)
+        with open(os.path.join(self.experiments_folder_id, '1', 'metadata.json'), 'r') as f:
+            metadata = json.load(f)
+            self.assertIn('end-time', metadata)
+
+    def test_exit(self):
+        run_in_fork(exit_testing_helper_exit.forced_exit, self.arg_list)
+        with open(os.path.join(self.experiments_folder_id, '1', 'metadata.json'), 'r') as f:
+            metadata = json.load(f)
+            self.assertIn('end-time', metadata)
+
+    def test_exception(self):
+        run_in_fork(exit_testing_helper_exception.raise_exception, self.arg_list)
+        with open(os.path.join(self.experiments_folder_id, '1', 'metadata.json'), 'r') as f:
+            metadata = json.load(f)
+            self.assertIn('end-time', metadata)
+
+    def tearDown(self):
+        shutil.rmtree(self.experiments_folder_id)
+        pass
+
+class ContextManagerEndTimeTestCase(unittest.TestCase):
+    # These tests run in a forked child because they test behaviour at program exit
+    def setUp(self):
+        self.experiments_folder_id = os.path.join('temp_files', 'experiments_' + self.id())
+        self.arg_list = ['--dry-run', '--epochs', '1', '--experiments-directory', self.experiments_folder_id]
+
+    def test_success(self):
+        clock = FakeClock()
+        run_in_fork(functools.partial(exit_testing_cm_helper_success.successful_exit, sleep=clock.sleep), self.arg_list, clock=clock)
+        with open(os.path.join(self.experiments_folder_id, '1', 'metadata.json'), 'r') as f:
+            metadata1 = json.load(f)
+            self.assertIn('end-time', metadata1)
+        with open(os.path.join(self.experiments_folder_id, '2', 'metadata.json'), 'r') as f:
+            metadata2 = json.load(f)
+            self.assertIn('end-time', metadata2)
+        with open(os.path.join(self.experiments_folder_id, '3', 'metadata.json'), 'r') as f:
+            metadata3 = json.load(f)
+            self.assertIn('end-time', metadata3)
+        end_time1 = datetime.datetime.strptime(metadata1["end-time"], "%Y-%m-%dT%H:%M:%S.%f")
+        end_time2 = datetime.datetime.strptime(metadata2["end-time"], "%Y-%m-%dT%H:%M:%S.%f")
+        end_time3 = datetime.datetime.strptime(metadata3["end-time"], "%Y-%m-%dT%H:%M:%S.%f")
+        self.assertTrue(end_time2 - end_time1 < datetime.timedelta(seconds=1))
+        self.assertTrue(end_time3 - end_time2 > datetime.timedelta(seconds=1))
+
+    def test_exception(self):
+        clock = FakeClock()
+        run_in_fork(functools.partial(exit_testing_cm_helper_exception.raise_exception, sleep=clock.sleep), self.arg_list, clock=clock)
+        with open(os.path.join(self.experiments_folder_id, '1', 'metadata.json'), 'r') as f:
+            metadata1 = json.load(f)
+            self.assertIn('end-time', metadata1)
+        with open(os.path.join(self.experiments_folder_id, '2', 'metadata.json'), 'r') as f:
+            metadata2 = json.load(f)
+            self.assertIn('end-time', metadata2)
+        end_time1 = datetime.datetime.strptime(metadata1["end-time"], "%Y-%m-%dT%H:%M:%S.%f")
+        end_time2 = datetime.datetime.strptime(metadata2["end-time"], "%Y-%m-%dT%H:%M:%S.%f")
+        self.assertTrue(end_time2 - end_time1 > datetime.timedelta(seconds=1))
+
+    def tearDown(self):
+        shutil.rmtree(self.experiments_folder_id)
+        pass
+
+
+class StatusTestCase(unittest.TestCase):
+    # These tests run in a forked child because they test behaviour at program exit
+    def setUp(self):
+        self.experiments_folder_id = os.path.join('temp_files','experiments_'+self.id())
+        self.arg_list = ['--dry-run', '--epochs', '1', '--experiments-directory', self.experiments_folder_id]
+
+    def test_success(self):
+        run_in_fork(exit_testing_helper_success.successful_exit, self.arg_list)
+        with open(os.path.join(self.experiments_folder_id, '1', 'STATUS'), 'r') as f:
+            self.assertEqual(f.readlines()[0].strip(), 'SUCCESS')
+
+    def test_exit(self):
+        run_in_fork(exit_testing_helper_exit.forced_exit, self.arg_list)
+        with open(os.path.join(self.experiments_folder_id, '1', 'STATUS'), 'r') as f:
+            self.assertEqual(f.readlines()[0].strip(), 'ERROR')
+
+    def test_exception(self):
+        run_in_fork(exit_testing_helper_exception.raise_exception, self.arg_list)
+        with open(os.path.join(self.experiments_folder_id, '1', 'STATUS'), 'r') as f:
+            lines = f.readlines()
+            self.assertEqual(lines[0].strip(), 'ERROR')
+            self.assertEqual(lines[1].strip(), 'Traceback (most recent call last):')
+
+    def tearDown(self):
+        shutil.rmtree(self.experiments_folder_id)
+        pass
+
+class ContextManagerStatusTestCase(unittest.TestCase):
+    """Test whether experiments in context manager produce the same output as 'global' experiments"""
+    # These tests run in a forked child because they test behaviour at program exit
+    def setUp(self):
+        self.experiments_folder_id = os.path.join('temp_files','experiments_'+self.id())
+        self.arg_list = ['--dry-run', '--epochs', '1', '--experiments-directory', self.experiments_folder_id]
+
+    def test_success(self):
+        clock = FakeClock()
+        run_in_fork(functools.partial(exit_testing_cm_helper_success.successful_exit, sleep=clock.sleep), self.arg_list, clock=clock)
+        # Context Manager
+        with open(os.path.join(self.experiments_folder_id, '1', 'STATUS'), 'r') as f:
+            exp1 = f.readlines()[0].strip()
+        # Experiment where we call 'finish' manually
+        with open(os.path.join(self.experiments_folder_id, '2', 'STATUS'), 'r') as f:
+            exp2 = f.readlines()[0].strip()
+        # Experiment that is terminated on exit
+        with open(os.path.join(self.experiments_folder_id, '3', 'STATUS'), 'r') as f:
+            exp3 = f.readlines()[0].strip()
+        self.assertEqual(exp1, 'SUCCESS')
+        self.assertEqual(exp1, exp2)
+        self.assertEqual(exp2, exp3)
+        # All experiments returned SUCCESS successfully
+
+    def test_exit(self):
+        run_in_fork(exit_testing_cm_helper_exit.forced_exit, self.arg_list)
+        with open(os.path.join(self.experiments_folder_id, '1', 'STATUS'), 'r') as f:
+            self.assertEqual(f.readlines()[0].strip(),'ERROR')
+
+    def test_exception(self):
+        clock = FakeClock()
+        run_in_fork(functools.partial(exit_testing_cm_helper_exception.raise_exception, sleep=clock.sleep), self.arg_list, clock=clock)
+        with open(os.path.join(self.experiments_folder_id, '1', 'STATUS'), 'r') as f:
+            lines1 = f.readlines()
+        with open(os.path.join(self.experiments_folder_id, '2', 'STATUS'), 'r') as f:
+            lines2 = f.readlines()
+        self.assertEqual(lines1[0].strip(), 'ERROR')
+        self.assertEqual(lines1[1].strip(), 'Traceback (most recent call last):')
+        # Test that the context manager (id 2) produces the same output as the global experiment (id 1)
+        self.assertEqual(lines1[0].strip(), lines2[0].strip())
+        self.assertEqual(lines1[1].strip(), lines2[1].strip())
+
+    def tearDown(self):
+        shutil.rmtree(self.experiments_folder_id)
+        pass
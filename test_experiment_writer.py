@@ -1,4 +1,5 @@
 import unittest
+from unittest import mock
 from .training_utils import build_training_parser, build_training_parser_with_required_args
 import subprocess
 import json
@@ -9,7 +10,11 @@ import os
 import shutil
 import sys
 import datetime
+import time
+import tempfile
 from git import Repo
+from git.cmd import Git
+from .repo_utils import build_scratch_repo, commit_file
 def id_generator(size=6, chars=string.ascii_uppercase + string.digits):
     return ''.join(random.choice(chars) for _ in range(size))
 
@@ -67,146 +72,6 @@ class DirtyRepoTestCase(unittest.TestCase):
         with open(os.path.join('simulated_files','dirty_file.txt'), 'w') as f:
             pass
 
-class EndTimeTestCase(unittest.TestCase):
-    # These tests are invoked with subproccess because they test behaviour at program exit
-    def setUp(self):
-        self.experiments_folder_id = os.path.join('temp_files', 'experiments_' + self.id())
-        self.arg_list = ['--dry-run', '--epochs', '1', '--experiments-directory', self.experiments_folder_id]
-
-    def test_success(self):
-        subprocess.run(['python', 'exit_testing_helper_success.py', ]+self.arg_list)
-        with open(os.path.join(self.experiments_folder_id, '1', 'metadata.json'), 'r') as f:
-            metadata = json.load(f)
-            self.assertIn('end-time', metadata)
-
-    def test_exit(self):
-        subprocess.run(['python', 'exit_testing_helper_exit.py', ]+self.arg_list)
-        with open(os.path.join(self.experiments_folder_id, '1', 'metadata.json'), 'r') as f:
-            metadata = json.load(f)
-            self.assertIn('end-time', metadata)
-
-    def test_exception(self):
-        subprocess.run(['python', 'exit_testing_helper_exception.py', ]+self.arg_list)
-        with open(os.path.join(self.experiments_folder_id, '1', 'metadata.json'), 'r') as f:
-            metadata = json.load(f)
-            self.assertIn('end-time', metadata)
-
-    def tearDown(self):
-        shutil.rmtree(self.experiments_folder_id)
-        pass
-
-class ContextManagerEndTimeTestCase(unittest.TestCase):
-    # These tests are invoked with subproccess because they test behaviour at program exit
-    def setUp(self):
-        self.experiments_folder_id = os.path.join('temp_files', 'experiments_' + self.id())
-        self.arg_list = ['--dry-run', '--epochs', '1', '--experiments-directory', self.experiments_folder_id]
-
-    def test_success(self):
-        subprocess.run(['python', 'exit_testing_cm_helper_success.py', ]+self.arg_list)
-        with open(os.path.join(self.experiments_folder_id, '1', 'metadata.json'), 'r') as f:
-            metadata1 = json.load(f)
-            self.assertIn('end-time', metadata1)
-        with open(os.path.join(self.experiments_folder_id, '2', 'metadata.json'), 'r') as f:
-            metadata2 = json.load(f)
-            self.assertIn('end-time', metadata2)
-        with open(os.path.join(self.experiments_folder_id, '3', 'metadata.json'), 'r') as f:
-            metadata3 = json.load(f)
-            self.assertIn('end-time', metadata3)
-        end_time1 = datetime.datetime.strptime(metadata1["end-time"], "%Y-%m-%dT%H:%M:%S.%f")
-        end_time2 = datetime.datetime.strptime(metadata2["end-time"], "%Y-%m-%dT%H:%M:%S.%f")
-        end_time3 = datetime.datetime.strptime(metadata3["end-time"], "%Y-%m-%dT%H:%M:%S.%f")
-        self.assertTrue(end_time2 - end_time1 < datetime.timedelta(seconds=1))
-        self.assertTrue(end_time3 - end_time2 > datetime.timedelta(seconds=1))
-
-    def test_exception(self):
-        subprocess.run(['python', 'exit_testing_cm_helper_exception.py', ]+self.arg_list)
-        with open(os.path.join(self.experiments_folder_id, '1', 'metadata.json'), 'r') as f:
-            metadata1 = json.load(f)
-            self.assertIn('end-time', metadata1)
-        with open(os.path.join(self.experiments_folder_id, '2', 'metadata.json'), 'r') as f:
-            metadata2 = json.load(f)
-            self.assertIn('end-time', metadata2)
-        end_time1 = datetime.datetime.strptime(metadata1["end-time"], "%Y-%m-%dT%H:%M:%S.%f")
-        end_time2 = datetime.datetime.strptime(metadata2["end-time"], "%Y-%m-%dT%H:%M:%S.%f")
-        self.assertTrue(end_time2 - end_time1 > datetime.timedelta(seconds=1))
-
-    def tearDown(self):
-        shutil.rmtree(self.experiments_folder_id)
-        pass
-
-
-class StatusTestCase(unittest.TestCase):
-    # These tests are invoked with subproccess because they test behaviour at program exit
-    def setUp(self):
-        self.experiments_folder_id = os.path.join('temp_files','experiments_'+self.id())
-        self.arg_list = ['--dry-run', '--epochs', '1', '--experiments-directory', self.experiments_folder_id]
-
-    def test_success(self):
-        subprocess.run(['python', 'exit_testing_helper_success.py', ]+self.arg_list)
-        with open(os.path.join(self.experiments_folder_id, '1', 'STATUS'), 'r') as f:
-            self.assertEqual(f.readlines()[0].strip(), 'SUCCESS')
-
-    def test_exit(self):
-        subprocess.run(['python', 'exit_testing_helper_exit.py', ]+self.arg_list)
-        with open(os.path.join(self.experiments_folder_id, '1', 'STATUS'), 'r') as f:
-            self.assertEqual(f.readlines()[0].strip(), 'ERROR')
-
-    def test_exception(self):
-        subprocess.run(['python', 'exit_testing_helper_exception.py', ]+self.arg_list)
-        with open(os.path.join(self.experiments_folder_id, '1', 'STATUS'), 'r') as f:
-            lines = f.readlines()
-            self.assertEqual(lines[0].strip(), 'ERROR')
-            self.assertEqual(lines[1].strip(), 'Traceback (most recent call last):')
-
-    def tearDown(self):
-        shutil.rmtree(self.experiments_folder_id)
-        pass
-
-class ContextManagerStatusTestCase(unittest.TestCase):
-    """Test whether experiments in context manager produce the same output as 'global' experiments"""
-    # These tests are invoked with subproccess because they test behaviour at program exit
-    def setUp(self):
-        self.experiments_folder_id = os.path.join('temp_files','experiments_'+self.id())
-        self.arg_list = ['--dry-run', '--epochs', '1', '--experiments-directory', self.experiments_folder_id]
-
-    def test_success(self):
-        subprocess.run(['python', 'exit_testing_cm_helper_success.py', ]+self.arg_list)
-        # Context Manager
-        with open(os.path.join(self.experiments_folder_id, '1', 'STATUS'), 'r') as f:
-            exp1 = f.readlines()[0].strip()
-        # Experiment where we call 'finish' manually
-        with open(os.path.join(self.experiments_folder_id, '2', 'STATUS'), 'r') as f:
-            exp2 = f.readlines()[0].strip()
-        # Experiment that is terminated on exit
-        with open(os.path.join(self.experiments_folder_id, '3', 'STATUS'), 'r') as f:
-            exp3 = f.readlines()[0].strip()
-        self.assertEqual(exp1, 'SUCCESS')
-        self.assertEqual(exp1, exp2)
-        self.assertEqual(exp2, exp3)
-        # All experiments returned SUCCESS successfully
-
-    def test_exit(self):
-        subprocess.run(['python', 'exit_testing_cm_helper_exit.py', ]+self.arg_list)
-        with open(os.path.join(self.experiments_folder_id, '1', 'STATUS'), 'r') as f:
-            self.assertEqual(f.readlines()[0].strip(),'ERROR')
-
-    def test_exception(self):
-        subprocess.run(['python', 'exit_testing_cm_helper_exception.py', ]+self.arg_list)
-        with open(os.path.join(self.experiments_folder_id, '1', 'STATUS'), 'r') as f:
-            lines1 = f.readlines()
-        with open(os.path.join(self.experiments_folder_id, '2', 'STATUS'), 'r') as f:
-            lines2 = f.readlines()
-        self.assertEqual(lines1[0].strip(), 'ERROR')
-        self.assertEqual(lines1[1].strip(), 'Traceback (most recent call last):')
-        # Test that the context manager (id 2) produces the same output as the global experiment (id 1)
-        self.assertEqual(lines1[0].strip(), lines2[0].strip())
-        self.assertEqual(lines1[1].strip(), lines2[1].strip())
-
-    def tearDown(self):
-        shutil.rmtree(self.experiments_folder_id)
-        pass
-
-
 class OutputTestCase(unittest.TestCase):
     def setUp(self):
         self.experiments_folder_id = os.path.join('temp_files', 'experiments_'+self.id())
@@ -411,3 +276,346 @@ class OutputTestCase(unittest.TestCase):
     def tearDown(self):
         shutil.rmtree(self.experiments_folder_id)
         pass
+
+class ConcurrentExperimentIdTestCase(unittest.TestCase):
+    # These tests are invoked with subprocess because they test id allocation across processes
+    n_processes = 24
+
+    def setUp(self):
+        self.experiments_folder_id = os.path.join('temp_files', 'experiments_'+self.id())
+        self.original_args_list = ['--dry-run', '--epochs', '1', '--seed', '234']
+        self.meticulous_args_list = ['--experiments-directory', self.experiments_folder_id]
+        self.barrier_dir = os.path.join('temp_files', 'barrier_'+self.id())
+
+    def test_unique_ids(self):
+        os.makedirs(self.barrier_dir)
+        env = dict(os.environ, METICULOUS_TEST_BARRIER_DIR=self.barrier_dir)
+        processes = [subprocess.Popen(['python', 'concurrency_testing_helper.py', ]+self.original_args_list+self.meticulous_args_list, env=env)
+                     for _ in range(self.n_processes)]
+        # Release all processes at once, only after every one of them has started up
+        deadline = time.time() + 60
+        while len([f for f in os.listdir(self.barrier_dir) if f.startswith('ready_')]) < self.n_processes:
+            if any(process.poll() is not None for process in processes):
+                for process in processes:
+                    process.kill()
+                self.fail("A helper process exited before reaching the barrier")
+            if time.time() > deadline:
+                for process in processes:
+                    process.kill()
+                    process.wait()
+                self.fail("The helper processes didn't all reach the barrier within 60 seconds")
+            time.sleep(0.01)
+        open(os.path.join(self.barrier_dir, 'go'), 'w').close()
+        for process in processes:
+            self.assertEqual(process.wait(), 0)
+        expected_ids = [str(i) for i in range(1, self.n_processes+1)]
+        # Two processes handed the same id would have written into the same folder
+        self.assertCountEqual([d for d in os.listdir(self.experiments_folder_id) if d.isdigit()], expected_ids)
+        for expid in expected_ids:
+            with open(os.path.join(self.experiments_folder_id, expid, 'STATUS'), 'r') as f:
+                self.assertEqual(f.readlines()[0].strip(), 'SUCCESS')
+
+    def test_allocation_doesnt_list_experiments_directory(self):
+        parser = build_training_parser()
+        Experiment.add_argument_group(parser)
+        # Folders created before the allocator kept any state of its own
+        n_existing = 300
+        for i in range(1, n_existing+1):
+            os.makedirs(os.path.join(self.experiments_folder_id, str(i)))
+        experiment = Experiment.from_parser(parser, self.original_args_list+self.meticulous_args_list)
+        self.assertTrue(experiment.curexpdir.endswith(str(n_existing+1)))
+        experiment.finish()
+
+        # Once the allocator has bootstrapped, allocating an id must not scan the existing runs
+        experiments_dir = os.path.realpath(self.experiments_folder_id)
+        def lists_experiments_dir(mocked):
+            return [c for c in mocked.call_args_list if c.args and os.path.realpath(os.fspath(c.args[0])) == experiments_dir]
+        with mock.patch('os.listdir', wraps=os.listdir) as listdir, mock.patch('os.scandir', wraps=os.scandir) as scandir:
+            for i in range(5):
+                experiment = Experiment.from_parser(parser, self.original_args_list+self.meticulous_args_list)
+                self.assertTrue(experiment.curexpdir.endswith(str(n_existing+2+i)))
+                experiment.finish()
+        self.assertEqual(lists_experiments_dir(listdir), [], msg="Experiment id allocation lists the experiments directory")
+        self.assertEqual(lists_experiments_dir(scandir), [], msg="Experiment id allocation scans the experiments directory")
+
+    def tearDown(self):
+        shutil.rmtree(self.barrier_dir, ignore_errors=True)
+        shutil.rmtree(self.experiments_folder_id)
+
+class GitStateCacheTestCase(unittest.TestCase):
+    """Git state may be cached between experiments, but never at the cost of missing a change to the repo"""
+    def setUp(self):
+        self.experiments_folder_id = os.path.abspath(os.path.join('temp_files', 'experiments_'+self.id()))
+        self.original_args_list = ['--dry-run', '--epochs', '1']
+        self.meticulous_args_list = ['--experiments-directory', self.experiments_folder_id]
+        self.parser = build_training_parser()
+        Experiment.add_argument_group(self.parser)
+        self.cwd = os.getcwd()
+        self.scratch_repo_dir = tempfile.mkdtemp(prefix='meticulous_scratch_')
+
+    def read_metadata(self, expid):
+        with open(os.path.join(self.experiments_folder_id, expid, 'metadata.json'), 'r') as f:
+            return json.load(f)
+
+    def test_dirty_after_clean(self):
+        Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list).finish()
+        with open(os.path.join('simulated_files', 'dirty_file.txt'), 'w') as f:
+            f.write('made dirty')
+        with self.assertRaises(DirtyRepoException):
+            Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list)
+
+    def test_new_commit(self):
+        repo = build_scratch_repo(self.scratch_repo_dir)
+        os.chdir(self.scratch_repo_dir)
+        Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list).finish()
+        commit = commit_file(repo, 'new_file.txt', 'new', message='Second commit')
+        Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list).finish()
+        metadata1, metadata2 = self.read_metadata('1'), self.read_metadata('2')
+        self.assertNotEqual(metadata1['githead-sha'], metadata2['githead-sha'])
+        self.assertEqual(metadata2['githead-sha'], commit.hexsha, msg="Stale githead-sha after a new commit")
+        self.assertEqual(metadata2['githead-message'], commit.message, msg="Stale githead-message after a new commit")
+
+    def test_cache_hit(self):
+        repo = build_scratch_repo(self.scratch_repo_dir)
+        os.chdir(self.scratch_repo_dir)
+        Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list).finish()
+        # With the index and HEAD unchanged, the next Experiment in this process must not scan the work tree again
+        with mock.patch.object(Repo, 'is_dirty', autospec=True, side_effect=Repo.is_dirty) as is_dirty, \
+                mock.patch.object(Git, 'execute', autospec=True, side_effect=Git.execute) as execute:
+            Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list).finish()
+        self.assertEqual(is_dirty.call_count, 0, msg="The dirty check ran again on an unchanged repo")
+        scans = [c.args[1] for c in execute.call_args_list if 'status' in c.args[1] or 'diff' in c.args[1]]
+        self.assertEqual(scans, [], msg="git was asked to scan an unchanged work tree again")
+        self.assertEqual(self.read_metadata('2')['githead-sha'], repo.commit().hexsha)
+
+    def test_persisted_cache(self):
+        cache_file = os.path.join(self.experiments_folder_id, 'git_cache')
+        arg_list = self.original_args_list + self.meticulous_args_list + ['--git-cache-file', cache_file]
+        subprocess.run(['python', 'exit_testing_helper_success.py', ]+arg_list)
+        self.assertTrue(os.path.exists(cache_file))
+        subprocess.run(['python', 'exit_testing_helper_success.py', ]+arg_list)
+        commit = Repo('', search_parent_directories=True).commit()
+        self.assertEqual(self.read_metadata('1')['githead-sha'], commit.hexsha)
+        self.assertEqual(self.read_metadata('2')['githead-sha'], commit.hexsha)
+
+        with open(os.path.join('simulated_files', 'dirty_file.txt'), 'w') as f:
+            f.write('made dirty')
+        process = subprocess.run(['python', 'exit_testing_helper_success.py', ]+arg_list)
+        self.assertNotEqual(process.returncode, 0, msg="Persisted git cache hid a dirty work tree")
+        self.assertFalse(os.path.exists(os.path.join(self.experiments_folder_id, '3')))
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        with open(os.path.join('simulated_files','dirty_file.txt'), 'w') as f:
+            pass
+        shutil.rmtree(self.scratch_repo_dir)
+        shutil.rmtree(self.experiments_folder_id, ignore_errors=True)
+
+class BufferedOutputTestCase(unittest.TestCase):
+    """Output captured through the buffered tee must be as complete and ordered as the synchronous tee"""
+    helper_lines = 5000 # Lines printed to each stream by exit_testing_chatty_helper.py
+    def setUp(self):
+        self.experiments_folder_id = os.path.join('temp_files', 'experiments_'+self.id())
+        self.original_args_list = ['--dry-run', '--epochs', '1', '--seed', '234']
+        self.meticulous_args_list = ['--experiments-directory', self.experiments_folder_id, '--buffered-output']
+        self.parser = build_training_parser()
+        Experiment.add_argument_group(self.parser)
+
+    def read_lines(self, expid, name):
+        with open(os.path.join(self.experiments_folder_id, expid, name), 'r') as f:
+            return [line.strip() for line in f.readlines()]
+
+    def test_order(self):
+        n_lines = 20000
+        experiment = Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list)
+        for i in range(n_lines):
+            print('stdout line {}'.format(i))
+            print('stderr line {}'.format(i), file=sys.stderr)
+        experiment.finish()
+        self.assertEqual(self.read_lines('1', 'stdout'), ['stdout line {}'.format(i) for i in range(n_lines)])
+        self.assertEqual(self.read_lines('1', 'stderr'), ['stderr line {}'.format(i) for i in range(n_lines)])
+
+    def test_flush_interval(self):
+        experiment = Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list+['--output-flush-interval', '0.05'])
+        print('stdout redirection text')
+        time.sleep(1)
+        # The writer thread flushes on its own, without waiting for the experiment to finish
+        self.assertEqual(self.read_lines('1', 'stdout'), ['stdout redirection text'])
+        experiment.finish()
+
+    def test_small_queue(self):
+        # A queue much smaller than the output applies back-pressure: print blocks until the writer thread drains it,
+        # and no lines are dropped
+        n_lines = 5000
+        experiment = Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list+['--output-queue-size', '4'])
+        for i in range(n_lines):
+            print('stdout line {}'.format(i))
+        experiment.finish()
+        self.assertEqual(self.read_lines('1', 'stdout'), ['stdout line {}'.format(i) for i in range(n_lines)])
+
+    def test_nested(self):
+        outer_experiment = Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list)
+        outer_stdout, outer_stderr = sys.stdout, sys.stderr
+        print("stdout redirection text 1")
+        with Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list) as inner_experiment:
+            # Nested experiments join the existing fan-out instead of wrapping it again
+            self.assertIs(sys.stdout, outer_stdout)
+            self.assertIs(sys.stderr, outer_stderr)
+            print("stdout redirection text 2")
+        print("stdout redirection text 3")
+        outer_experiment.finish()
+        self.assertEqual(self.read_lines('1', 'stdout'),
+                         ["stdout redirection text 1", "stdout redirection text 2", "stdout redirection text 3"])
+        self.assertEqual(self.read_lines('2', 'stdout'), ["stdout redirection text 2"])
+
+    def check_helper_output(self, mode):
+        subprocess.run(['python', 'exit_testing_chatty_helper.py', mode]+self.original_args_list+self.meticulous_args_list)
+        self.assertEqual(self.read_lines('1', 'stdout'), ['stdout line {}'.format(i) for i in range(self.helper_lines)])
+        stderr_lines = self.read_lines('1', 'stderr')
+        self.assertEqual(stderr_lines[:self.helper_lines], ['stderr line {}'.format(i) for i in range(self.helper_lines)])
+        return stderr_lines
+
+    def test_success(self):
+        self.check_helper_output('success')
+
+    def test_exit(self):
+        self.check_helper_output('exit')
+
+    def test_exception(self):
+        stderr_lines = self.check_helper_output('exception')
+        # The traceback is written after everything that was printed before the exception
+        self.assertIn('Traceback (most recent call last):', stderr_lines[self.helper_lines:])
+
+    def tearDown(self):
+        shutil.rmtree(self.experiments_folder_id)
+        pass
+
+class MemoizationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.experiments_folder_id = os.path.join('temp_files', 'experiments_'+self.id())
+        self.original_args_list = ['--dry-run', '--epochs', '1', '--seed', '234']
+        self.meticulous_args_list = ['--experiments-directory', self.experiments_folder_id]
+        self.parser = build_training_parser()
+        Experiment.add_argument_group(self.parser)
+
+    def read_metadata(self, expid):
+        with open(os.path.join(self.experiments_folder_id, expid, 'metadata.json'), 'r') as f:
+            return json.load(f)
+
+    def test_fingerprint(self):
+        Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list).finish()
+        Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list).finish()
+        Experiment.from_parser(self.parser, self.original_args_list+['--lr', '0.5']+self.meticulous_args_list).finish()
+        fingerprint1, fingerprint2, fingerprint3 = [self.read_metadata(expid)['fingerprint'] for expid in ['1', '2', '3']]
+        self.assertEqual(fingerprint1, fingerprint2)
+        self.assertNotEqual(fingerprint1, fingerprint3)
+
+    def test_reuse_successful(self):
+        with Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list) as experiment:
+            experiment.summary({'val_loss': 0.25})
+        experiment = Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list, reuse_successful=True)
+        self.assertTrue(experiment.curexpdir.endswith("1"))
+        self.assertFalse(os.path.exists(os.path.join(self.experiments_folder_id, '2')))
+        self.assertEqual(experiment.summary(), {'val_loss': 0.25})
+        experiment.finish()
+        with open(os.path.join(self.experiments_folder_id, '1', 'STATUS'), 'r') as f:
+            self.assertEqual(f.readlines()[0].strip(), 'SUCCESS')
+
+    def test_changed_args(self):
+        Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list).finish()
+        args_list = self.original_args_list + ['--lr', '0.5']
+        experiment = Experiment.from_parser(self.parser, args_list+self.meticulous_args_list, reuse_successful=True)
+        self.assertTrue(experiment.curexpdir.endswith("2"))
+        experiment.finish()
+
+    def test_failed_experiment(self):
+        try:
+            with Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list) as experiment:
+                raise ValueError
+        except ValueError:
+            pass
+        # Only successful experiments are reused, a failed one is run again
+        experiment = Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list, reuse_successful=True)
+        self.assertTrue(experiment.curexpdir.endswith("2"))
+        experiment.finish()
+
+    def tearDown(self):
+        shutil.rmtree(self.experiments_folder_id)
+        pass
+
+class DirtySnapshotTestCase(unittest.TestCase):
+    def setUp(self):
+        self.experiments_folder_id = os.path.join('temp_files', 'experiments_'+self.id())
+        self.original_args_list = ['--dry-run', '--epochs', '1']
+        self.meticulous_args_list = ['--experiments-directory', self.experiments_folder_id, '--snapshot-dirty']
+        self.untracked_file = os.path.join('simulated_files', 'untracked_file.txt')
+        #Dirty a file in the repo
+        with open(os.path.join('simulated_files', 'dirty_file.txt'), 'w') as f:
+            f.write('made dirty')
+        self.parser = build_training_parser()
+        Experiment.add_argument_group(self.parser)
+
+    def read_snapshot(self, expid):
+        with open(os.path.join(self.experiments_folder_id, expid, 'metadata.json'), 'r') as f:
+            snapshot = json.load(f)['dirty-snapshot']
+        with open(os.path.join(self.experiments_folder_id, expid, 'dirty.patch'), 'r') as f:
+            return snapshot, f.read()
+
+    def test_snapshot(self):
+        with open(self.untracked_file, 'w') as f:
+            f.write('untracked')
+        Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list).finish()
+        snapshot, patch = self.read_snapshot('1')
+        self.assertIn('made dirty', patch)
+        self.assertIn('untracked_file.txt', patch)
+        # Experiments are written into the work tree but are never part of the snapshot
+        self.assertNotIn('experiments_', patch)
+
+    def test_shared_snapshot(self):
+        diff_calls = []
+        with mock.patch.object(Git, 'execute', autospec=True, side_effect=Git.execute) as execute:
+            for _ in range(3):
+                Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list).finish()
+                diff_calls.append(len([c for c in execute.call_args_list if 'diff' in c.args[1]]))
+        # The diff is computed for the first launch only; the others reuse it through the cached git status
+        self.assertGreater(diff_calls[0], 0)
+        self.assertEqual(diff_calls, [diff_calls[0]]*3, msg="The dirty-tree diff is recomputed for an unchanged tree")
+        snapshots = [self.read_snapshot(expid) for expid in ['1', '2', '3']]
+        self.assertEqual(len(set(snapshots)), 1)
+        # Each run's dirty.patch may be a hardlink or a reflink, but the content-addressed store keeps a single copy
+        patch = snapshots[0][1]
+        stored = []
+        for root, _, files in os.walk(self.experiments_folder_id):
+            for name in files:
+                path = os.path.join(root, name)
+                if name == 'dirty.patch' and os.path.dirname(os.path.relpath(path, self.experiments_folder_id)) in ['1', '2', '3']:
+                    continue
+                with open(path, 'r', errors='replace') as f:
+                    if f.read() == patch:
+                        stored.append(path)
+        self.assertEqual(len(stored), 1, msg="Identical dirty states are stored more than once: {}".format(stored))
+
+    def test_changed_dirty_state(self):
+        Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list).finish()
+        with open(os.path.join('simulated_files', 'dirty_file.txt'), 'w') as f:
+            f.write('made dirty again')
+        Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list).finish()
+        (snapshot1, _), (snapshot2, patch2) = self.read_snapshot('1'), self.read_snapshot('2')
+        self.assertNotEqual(snapshot1, snapshot2)
+        self.assertIn('made dirty again', patch2)
+
+    def test_clean_repo(self):
+        with open(os.path.join('simulated_files', 'dirty_file.txt'), 'w') as f:
+            pass
+        experiment = Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list)
+        experiment.finish()
+        with open(os.path.join(self.experiments_folder_id, '1', 'metadata.json'), 'r') as f:
+            self.assertNotIn('dirty-snapshot', json.load(f))
+        self.assertFalse(os.path.exists(os.path.join(self.experiments_folder_id, '1', 'dirty.patch')))
+
+    def tearDown(self):
+        with open(os.path.join('simulated_files','dirty_file.txt'), 'w') as f:
+            pass
+        if os.path.exists(self.untracked_file):
+            os.remove(self.untracked_file)
+        shutil.rmtree(self.experiments_folder_id)
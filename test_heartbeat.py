@@ -0,0 +1,71 @@
+import unittest
+from .training_utils import build_training_parser
+import subprocess
+from meticulous import Experiment
+from meticulous.heartbeat import read_heartbeat, scan_heartbeats
+import os
+import shutil
+import signal
+import time
+
+class HeartbeatTestCase(unittest.TestCase):
+    def setUp(self):
+        self.experiments_folder_id = os.path.join('temp_files', 'experiments_'+self.id())
+        self.original_args_list = ['--dry-run', '--epochs', '1']
+        self.meticulous_args_list = ['--experiments-directory', self.experiments_folder_id,
+                                     '--heartbeat-interval', '0.05', '--heartbeat-metrics', 'loss']
+        self.parser = build_training_parser()
+        Experiment.add_argument_group(self.parser)
+
+    def test_record(self):
+        experiment = Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list)
+        experiment.log(10, loss=0.3, accuracy=0.9)
+        time.sleep(0.5)
+        heartbeat = read_heartbeat(experiment.curexpdir)
+        self.assertEqual(heartbeat['step'], 10)
+        # Only the chosen metrics are kept in the fixed-size record
+        self.assertEqual(list(heartbeat['metrics']), ['loss'])
+        # The record may store float32
+        self.assertAlmostEqual(heartbeat['metrics']['loss'], 0.3, places=6)
+        self.assertLess(time.time() - heartbeat['last-alive'], 1)
+        experiment.finish()
+
+    def test_scan(self):
+        Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list).finish()
+        process = subprocess.Popen(['python', 'heartbeat_testing_helper.py', ]+self.original_args_list+self.meticulous_args_list)
+        killed_expdir = os.path.join(self.experiments_folder_id, '2')
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            try:
+                if read_heartbeat(killed_expdir)['step'] == 4:
+                    break
+            except FileNotFoundError:
+                # The helper hasn't written its first heartbeat yet
+                pass
+            time.sleep(0.1)
+        else:
+            process.kill()
+            process.wait()
+            self.fail("The helper didn't reach step 4 within 30 seconds")
+        process.send_signal(signal.SIGKILL)
+        process.wait()
+        running = Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list)
+        time.sleep(1)
+        self.assertEqual(scan_heartbeats(self.experiments_folder_id, stale_after=0.5),
+                         {'1': 'finished', '2': 'stale', '3': 'running'})
+        running.finish()
+
+    def test_scan_time(self):
+        Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list).finish()
+        n_experiments = 5000
+        for i in range(2, n_experiments+1):
+            shutil.copytree(os.path.join(self.experiments_folder_id, '1'), os.path.join(self.experiments_folder_id, str(i)))
+        start = time.perf_counter()
+        states = scan_heartbeats(self.experiments_folder_id, stale_after=60)
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(len(states), n_experiments)
+        self.assertEqual(set(states.values()), {'finished'})
+
+    def tearDown(self):
+        shutil.rmtree(self.experiments_folder_id)
+        pass
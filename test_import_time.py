@@ -0,0 +1,45 @@
+import unittest
+import subprocess
+import sys
+
+# How many times the cumulative import time of REFERENCE_MODULE, timed in the same run, `import meticulous` may take.
+# A relative budget scales with the machine running the tests. When this was written asyncio took 47ms on Python 3.11,
+# so the budget was about 140ms. Raise it deliberately, in the same commit that explains why, when meticulous
+# legitimately needs to import more at startup.
+REFERENCE_MODULE = 'asyncio'
+IMPORT_TIME_BUDGET = 3.0
+# Modules that must only be imported once a feature that needs them is used
+LAZY_MODULES = ['git', 'sqlite3', 'numpy']
+
+def measure_import(statement):
+    """Return the cumulative import time in microseconds of each top-level package imported by `statement`"""
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                             stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Nested imports are indented below their parent; only top-level entries are kept
+        if name[1:] == name.lstrip():
+            times[name.strip()] = times.get(name.strip(), 0) + int(cumulative)
+    return times
+
+class ImportTimeTestCase(unittest.TestCase):
+    def test_budget(self):
+        # Take the best of a few interleaved runs so that a busy machine doesn't fail the test
+        import_times, reference_times = [], []
+        for _ in range(5):
+            import_times.append(measure_import('from meticulous import Experiment')['meticulous'])
+            reference_times.append(measure_import('import '+REFERENCE_MODULE)[REFERENCE_MODULE])
+        import_time, budget = min(import_times), IMPORT_TIME_BUDGET*min(reference_times)
+        self.assertLess(import_time, budget,
+                        msg="Importing meticulous took {}us, over the {:.0f}us budget ({}x {})".format(
+                            import_time, budget, IMPORT_TIME_BUDGET, REFERENCE_MODULE))
+
+    def test_lazy_modules(self):
+        process = subprocess.run([sys.executable, '-c', 'import sys; from meticulous import Experiment; print(" ".join(sys.modules))'],
+                                 stdout=subprocess.PIPE, universal_newlines=True, check=True)
+        imported = set(process.stdout.split())
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, imported, msg="{} is imported eagerly by meticulous".format(module))
@@ -0,0 +1,97 @@
+import unittest
+from .training_utils import build_training_parser
+import subprocess
+import json
+from meticulous import Experiment
+from meticulous.index import ExperimentIndex
+import os
+import shutil
+import sys
+import time
+from git import Repo
+
+class ExperimentIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.experiments_folder_id = os.path.join('temp_files', 'experiments_'+self.id())
+        self.original_args_list = ['--dry-run', '--epochs', '1']
+        self.meticulous_args_list = ['--experiments-directory', self.experiments_folder_id]
+        self.parser = build_training_parser()
+        Experiment.add_argument_group(self.parser)
+        self.githead_sha = Repo('', search_parent_directories=True).commit().hexsha
+
+    def run_experiments(self):
+        # (lr, val_loss) pairs; the last experiment fails and never gets a summary
+        for lr, val_loss in [('0.1', 0.5), ('0.3', 0.2), ('0.6', 0.1), ('0.4', 0.3)]:
+            with Experiment.from_parser(self.parser, self.original_args_list+['--lr', lr]+self.meticulous_args_list) as experiment:
+                experiment.summary({'val_loss': val_loss})
+        try:
+            with Experiment.from_parser(self.parser, self.original_args_list+['--lr', '0.2']+self.meticulous_args_list) as experiment:
+                raise ValueError
+        except ValueError:
+            pass
+
+    def query_ids(self, index):
+        runs = index.query(status='SUCCESS', githead_sha=self.githead_sha,
+                           filters=[('lr', '<', 0.5)], order_by='val_loss')
+        return [run['id'] for run in runs]
+
+    def test_updated_by_experiments(self):
+        self.run_experiments()
+        index = ExperimentIndex(self.experiments_folder_id)
+        self.assertEqual(self.query_ids(index), ['2', '4', '1'])
+        runs = index.query(status='ERROR')
+        self.assertEqual([run['id'] for run in runs], ['5'])
+        self.assertEqual(runs[0]['args']['lr'], 0.2)
+
+    def test_rebuild(self):
+        self.run_experiments()
+        index = ExperimentIndex(self.experiments_folder_id)
+        expected = index.query()
+        os.remove(index.path)
+        # Folders written before the index existed are picked up by a rebuild
+        index = ExperimentIndex(self.experiments_folder_id)
+        index.rebuild()
+        self.assertEqual(index.query(), expected)
+        self.assertEqual(self.query_ids(index), ['2', '4', '1'])
+
+    def test_query_time(self):
+        n_experiments = 5000
+        args = vars(build_training_parser().parse_args([]))
+        for i in range(1, n_experiments+1):
+            expdir = os.path.join(self.experiments_folder_id, str(i))
+            os.makedirs(expdir)
+            with open(os.path.join(expdir, 'args.json'), 'w') as f:
+                json.dump(dict(args, lr=i/n_experiments), f)
+            with open(os.path.join(expdir, 'metadata.json'), 'w') as f:
+                json.dump({'githead-sha': self.githead_sha}, f)
+            with open(os.path.join(expdir, 'summary.json'), 'w') as f:
+                json.dump({'val_loss': (i*7919 % n_experiments)/n_experiments}, f)
+            with open(os.path.join(expdir, 'STATUS'), 'w') as f:
+                f.write('SUCCESS\n' if i % 2 else 'ERROR\n')
+        index = ExperimentIndex(self.experiments_folder_id)
+        index.rebuild()
+        start = time.perf_counter()
+        runs = index.query(status='SUCCESS', githead_sha=self.githead_sha,
+                           filters=[('lr', '<', 0.5)], order_by='val_loss')
+        self.assertLess(time.perf_counter() - start, 0.05)
+        self.assertEqual(len(runs), n_experiments//4)
+        val_losses = [run['summary']['val_loss'] for run in runs]
+        self.assertEqual(val_losses, sorted(val_losses))
+
+    def test_cli(self):
+        self.run_experiments()
+        os.remove(ExperimentIndex(self.experiments_folder_id).path)
+        process = subprocess.run([sys.executable, '-m', 'meticulous.index', self.experiments_folder_id, 'rebuild'])
+        self.assertEqual(process.returncode, 0)
+        process = subprocess.run([sys.executable, '-m', 'meticulous.index', self.experiments_folder_id, 'query',
+                                  '--status', 'SUCCESS', '--githead-sha', self.githead_sha,
+                                  '--filter', 'lr<0.5', '--order-by', 'val_loss'],
+                                 stdout=subprocess.PIPE, universal_newlines=True)
+        self.assertEqual(process.returncode, 0)
+        # One JSON object per matching experiment
+        runs = [json.loads(line) for line in process.stdout.splitlines()]
+        self.assertEqual([run['id'] for run in runs], ['2', '4', '1'])
+
+    def tearDown(self):
+        shutil.rmtree(self.experiments_folder_id)
+        pass
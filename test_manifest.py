@@ -0,0 +1,74 @@
+import unittest
+from unittest import mock
+from .training_utils import build_training_parser
+import subprocess
+from meticulous import Experiment
+from meticulous.experiment import MismatchedArgsException
+from meticulous.manifest import load_manifest
+import os
+import shutil
+
+class ManifestTestCase(unittest.TestCase):
+    def setUp(self):
+        self.experiments_folder_id = os.path.join('temp_files', 'experiments_'+self.id())
+        self.original_args_list = ['--dry-run', '--epochs', '1', '--seed', '234']
+        self.meticulous_args_list = ['--experiments-directory', self.experiments_folder_id]
+        self.manifest_args_list = self.meticulous_args_list + ['--layout', 'manifest']
+        self.parser = build_training_parser()
+        self.args = vars(self.parser.parse_args(self.original_args_list))
+        self.default_args = vars(self.parser.parse_args([]))
+        Experiment.add_argument_group(self.parser)
+
+    def test_manifest_layout(self):
+        with Experiment.from_parser(self.parser, self.original_args_list+self.manifest_args_list) as experiment:
+            print('stdout redirection text')
+            experiment.summary({'val_loss': 0.25})
+        self.assertCountEqual(os.listdir(experiment.curexpdir), ['manifest.json', 'stdout', 'stderr'])
+        manifest = load_manifest(experiment.curexpdir)
+        self.assertDictEqual(manifest['args'], self.args)
+        self.assertDictEqual(manifest['default_args'], self.default_args)
+        self.assertEqual(manifest['status'], 'SUCCESS')
+        self.assertEqual(manifest['summary'], {'val_loss': 0.25})
+        self.assertIn('githead-sha', manifest['metadata'])
+        self.assertIn('end-time', manifest['metadata'])
+
+    def test_per_file_layout(self):
+        # Experiments written with the default layout read back the same way
+        with Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list) as experiment:
+            experiment.summary({'val_loss': 0.25})
+        self.assertTrue(os.path.exists(os.path.join(experiment.curexpdir, 'args.json')))
+        manifest = load_manifest(experiment.curexpdir)
+        self.assertDictEqual(manifest['args'], self.args)
+        self.assertDictEqual(manifest['default_args'], self.default_args)
+        self.assertEqual(manifest['status'], 'SUCCESS')
+        self.assertEqual(manifest['summary'], {'val_loss': 0.25})
+
+    def test_exception(self):
+        subprocess.run(['python', 'exit_testing_helper_exception.py', ]+self.original_args_list+self.manifest_args_list)
+        manifest = load_manifest(os.path.join(self.experiments_folder_id, '1'))
+        self.assertEqual(manifest['status'], 'ERROR')
+        self.assertIn('end-time', manifest['metadata'])
+
+    def test_resuming_experiment(self):
+        experiment_id_args = ['--experiment-id', '2']
+        Experiment.from_parser(self.parser, self.original_args_list+self.manifest_args_list+experiment_id_args).finish()
+        experiment = Experiment.from_parser(self.parser, self.original_args_list+self.manifest_args_list+experiment_id_args)
+        self.assertTrue(experiment.curexpdir.endswith("2"))
+        experiment.finish()
+        with self.assertRaises(MismatchedArgsException):
+            Experiment.from_parser(self.parser, self.original_args_list+['--lr', '0.5']+self.manifest_args_list+experiment_id_args)
+
+    def test_fsync_policy(self):
+        with mock.patch('os.fsync') as fsync:
+            Experiment.from_parser(self.parser, self.original_args_list+self.manifest_args_list+['--fsync', 'never']).finish()
+            self.assertEqual(fsync.call_count, 0)
+        with mock.patch('os.fsync') as fsync:
+            Experiment.from_parser(self.parser, self.original_args_list+self.manifest_args_list+['--fsync', 'always']).finish()
+            self.assertGreater(fsync.call_count, 0)
+        # Every write went through a temporary file that was renamed into place
+        for expid in ['1', '2']:
+            self.assertCountEqual(os.listdir(os.path.join(self.experiments_folder_id, expid)), ['manifest.json', 'stdout', 'stderr'])
+
+    def tearDown(self):
+        shutil.rmtree(self.experiments_folder_id)
+        pass
@@ -0,0 +1,67 @@
+import unittest
+from .training_utils import build_training_parser
+import subprocess
+from meticulous import Experiment
+from meticulous.metrics import load_metric
+import numpy as np
+import os
+import shutil
+import time
+
+class MetricsLogTestCase(unittest.TestCase):
+    def setUp(self):
+        self.experiments_folder_id = os.path.join('temp_files', 'experiments_'+self.id())
+        self.original_args_list = ['--dry-run', '--epochs', '1']
+        self.meticulous_args_list = ['--experiments-directory', self.experiments_folder_id]
+        self.parser = build_training_parser()
+        Experiment.add_argument_group(self.parser)
+
+    def test_read_back(self):
+        experiment = Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list)
+        for step in range(5000):
+            experiment.log(step, loss=1.0/(step+1), accuracy=step/5000)
+        experiment.log(5000, loss=0.0)
+        experiment.finish()
+        loss = load_metric(self.experiments_folder_id, 'loss')
+        steps, values = loss['1']
+        self.assertIsInstance(values, np.ndarray)
+        np.testing.assert_array_equal(steps, np.arange(5001))
+        np.testing.assert_allclose(values, np.append(1.0/np.arange(1, 5001), 0.0))
+        # Metrics that weren't logged at every step only have values for the steps they were logged at
+        steps, values = load_metric(self.experiments_folder_id, 'accuracy')['1']
+        np.testing.assert_array_equal(steps, np.arange(5000))
+
+    def test_many_experiments(self):
+        for lr in ['0.1', '0.2', '0.3']:
+            with Experiment.from_parser(self.parser, self.original_args_list+['--lr', lr]+self.meticulous_args_list) as experiment:
+                for step in range(100):
+                    experiment.log(step, loss=float(lr)*step)
+        loss = load_metric(self.experiments_folder_id, 'loss')
+        self.assertCountEqual(loss.keys(), ['1', '2', '3'])
+        np.testing.assert_allclose(loss['3'][1], 0.3*np.arange(100))
+        loss = load_metric(self.experiments_folder_id, 'loss', experiment_ids=['2'])
+        self.assertCountEqual(loss.keys(), ['2'])
+
+    def test_flush_interval(self):
+        experiment = Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list+['--metrics-flush-interval', '0.05'])
+        experiment.log(0, loss=1.0)
+        experiment.log(1, loss=0.5)
+        time.sleep(1)
+        # Already flushed although the experiment is still running
+        steps, values = load_metric(self.experiments_folder_id, 'loss')['1']
+        np.testing.assert_array_equal(steps, [0, 1])
+        experiment.finish()
+
+    def test_exception(self):
+        subprocess.run(['python', 'exit_testing_metrics_helper.py', 'exception']+self.original_args_list+self.meticulous_args_list)
+        steps, values = load_metric(self.experiments_folder_id, 'loss')['1']
+        self.assertEqual(len(steps), 1000)
+
+    def test_crash(self):
+        subprocess.run(['python', 'exit_testing_metrics_helper.py', 'crash']+self.original_args_list+self.meticulous_args_list+['--metrics-flush-interval', '0.1'])
+        steps, values = load_metric(self.experiments_folder_id, 'loss')['1']
+        np.testing.assert_array_equal(steps, np.arange(1000))
+
+    def tearDown(self):
+        shutil.rmtree(self.experiments_folder_id)
+        pass
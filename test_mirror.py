@@ -0,0 +1,114 @@
+import unittest
+from .training_utils import build_training_parser
+import subprocess
+from meticulous import Experiment
+from meticulous.mirror import Mirror, MirrorTarget, LocalDirectoryTarget
+import filecmp
+import os
+import shutil
+import sys
+import time
+
+class InMemoryTarget(MirrorTarget):
+    """Stands in for an S3-compatible bucket; fails every put after `fail_after` of them"""
+    def __init__(self, objects, fail_after=None):
+        self.objects = objects
+        self.fail_after = fail_after
+
+    def put(self, key, fileobj):
+        if self.fail_after is not None and self.fail_after <= 0:
+            raise OSError('Connection reset')
+        if self.fail_after is not None:
+            self.fail_after -= 1
+        self.objects[key] = fileobj.read()
+
+class MirrorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.experiments_folder_id = os.path.join('temp_files', 'experiments_'+self.id())
+        self.mirror_folder_id = os.path.join('temp_files', 'mirror_'+self.id())
+        self.state_file = os.path.join('temp_files', 'mirror_state_'+self.id())
+        self.original_args_list = ['--dry-run', '--epochs', '1']
+        self.meticulous_args_list = ['--experiments-directory', self.experiments_folder_id]
+        self.parser = build_training_parser()
+        Experiment.add_argument_group(self.parser)
+
+    def assertMirrored(self):
+        comparison = filecmp.dircmp(self.experiments_folder_id, self.mirror_folder_id)
+        def check(comparison):
+            self.assertEqual(comparison.left_only, [])
+            self.assertEqual(filecmp.cmpfiles(comparison.left, comparison.right, comparison.common_files, shallow=False)[1:], ([], []))
+            for subdir in comparison.subdirs.values():
+                check(subdir)
+        check(comparison)
+
+    def snapshot(self):
+        contents = {}
+        for root, _, files in os.walk(self.experiments_folder_id):
+            for name in files:
+                path = os.path.join(root, name)
+                with open(path, 'rb') as f:
+                    contents[os.path.relpath(path, self.experiments_folder_id)] = f.read()
+        return contents
+
+    def test_incremental(self):
+        Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list).finish()
+        mirror = Mirror(self.experiments_folder_id, LocalDirectoryTarget(self.mirror_folder_id), state_file=self.state_file)
+        self.assertIn(os.path.join('1', 'metadata.json'), mirror.sync())
+        self.assertMirrored()
+        self.assertEqual(mirror.sync(), [])
+
+        # An active run is mirrored too, and only what changed is pushed again
+        before = self.snapshot()
+        experiment = Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list)
+        print('stdout redirection text 1')
+        transferred = mirror.sync()
+        after = self.snapshot()
+        # Bookkeeping at the root of the experiments directory may change when a run starts, so compare against what
+        # actually changed on disk rather than against run 2's directory
+        changed = {path for path in after if before.get(path) != after[path]}
+        self.assertIn(os.path.join('2', 'args.json'), transferred)
+        self.assertLessEqual(set(transferred), changed)
+        self.assertFalse([path for path in transferred if path.split(os.sep)[0] == '1'])
+        print('stdout redirection text 2')
+        experiment.finish()
+        transferred = mirror.sync()
+        self.assertIn(os.path.join('2', 'stdout'), transferred)
+        self.assertIn(os.path.join('2', 'STATUS'), transferred)
+        self.assertNotIn(os.path.join('2', 'args.json'), transferred)
+        self.assertMirrored()
+
+    def test_resume(self):
+        for _ in range(3):
+            Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list).finish()
+        objects = {}
+        with self.assertRaises(OSError):
+            Mirror(self.experiments_folder_id, InMemoryTarget(objects, fail_after=4), state_file=self.state_file, batch_size=2).sync()
+        pushed_before = set(objects)
+        # A new mirror picks up from the last completed batch instead of starting over
+        transferred = Mirror(self.experiments_folder_id, InMemoryTarget(objects), state_file=self.state_file, batch_size=2).sync()
+        self.assertEqual(set(transferred) & pushed_before, set())
+        for expid in ['1', '2', '3']:
+            with open(os.path.join(self.experiments_folder_id, expid, 'args.json'), 'rb') as f:
+                self.assertEqual(objects[os.path.join(expid, 'args.json')], f.read())
+
+    def test_background(self):
+        mirror = Mirror(self.experiments_folder_id, LocalDirectoryTarget(self.mirror_folder_id), state_file=self.state_file,
+                        max_bytes_per_second=10*1024*1024)
+        mirror.start(interval=0.1)
+        Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list).finish()
+        time.sleep(1)
+        mirror.stop()
+        self.assertMirrored()
+
+    def test_cli(self):
+        Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list).finish()
+        process = subprocess.run([sys.executable, '-m', 'meticulous.mirror', self.experiments_folder_id, self.mirror_folder_id,
+                                  '--state-file', self.state_file, '--once'])
+        self.assertEqual(process.returncode, 0)
+        self.assertMirrored()
+
+    def tearDown(self):
+        shutil.rmtree(self.experiments_folder_id)
+        shutil.rmtree(self.mirror_folder_id, ignore_errors=True)
+        if os.path.exists(self.state_file):
+            os.remove(self.state_file)
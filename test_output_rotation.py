@@ -0,0 +1,82 @@
+import unittest
+from .training_utils import build_training_parser
+from meticulous import Experiment
+from meticulous.output import OutputReader
+import gzip
+import os
+import shutil
+import sys
+import time
+
+class OutputRotationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.experiments_folder_id = os.path.join('temp_files', 'experiments_'+self.id())
+        self.original_args_list = ['--dry-run', '--epochs', '1', '--seed', '234']
+        self.meticulous_args_list = ['--experiments-directory', self.experiments_folder_id]
+        self.parser = build_training_parser()
+        Experiment.add_argument_group(self.parser)
+
+    def print_lines(self, n_lines, prefix=''):
+        for i in range(n_lines):
+            print('{}stdout line {}'.format(prefix, i))
+            print('{}stderr line {}'.format(prefix, i), file=sys.stderr)
+        return ['{}stdout line {}'.format(prefix, i) for i in range(n_lines)]
+
+    def test_size_rotation(self):
+        rotation_args = ['--output-rotate-bytes', '65536', '--output-compression', 'gzip']
+        experiment = Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list+rotation_args)
+        expected = self.print_lines(20000)
+        experiment.finish()
+        reader = OutputReader(experiment.curexpdir, 'stdout')
+        self.assertGreater(len(reader.segments), 1)
+        for segment in reader.segments[:-1]:
+            with open(segment, 'rb') as f:
+                self.assertEqual(f.read(2), b'\x1f\x8b', msg="Rotated segment isn't gzip compressed")
+            with gzip.open(segment, 'rb') as f:
+                self.assertLessEqual(len(f.read()), 65536 + 1024)
+        self.assertEqual([line.rstrip('\n') for line in reader.lines()], expected)
+        self.assertEqual(len(list(OutputReader(experiment.curexpdir, 'stderr').lines())), 20000)
+
+    def test_tail(self):
+        rotation_args = ['--output-rotate-bytes', '4096', '--output-compression', 'gzip']
+        experiment = Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list+rotation_args)
+        expected = self.print_lines(5000)
+        experiment.finish()
+        reader = OutputReader(experiment.curexpdir, 'stdout')
+        self.assertEqual([line.rstrip('\n') for line in reader.tail(3)], expected[-3:])
+        # More lines than the last segment holds
+        self.assertEqual([line.rstrip('\n') for line in reader.tail(1000)], expected[-1000:])
+
+    def test_time_rotation(self):
+        experiment = Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list+['--output-rotate-seconds', '0.2'])
+        print("stdout redirection text 1")
+        time.sleep(0.5)
+        print("stdout redirection text 2")
+        experiment.finish()
+        reader = OutputReader(experiment.curexpdir, 'stdout')
+        self.assertGreaterEqual(len(reader.segments), 2)
+        self.assertEqual([line.strip() for line in reader.lines()], ["stdout redirection text 1", "stdout redirection text 2"])
+
+    def test_nested(self):
+        rotation_args = ['--output-rotate-bytes', '4096', '--output-compression', 'gzip']
+        outer_experiment = Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list+rotation_args)
+        expected_outer = self.print_lines(500, prefix='outer ')
+        with Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list+rotation_args) as inner_experiment:
+            expected_inner = self.print_lines(500, prefix='inner ')
+        expected_outer += expected_inner + self.print_lines(500, prefix='outer again ')
+        outer_experiment.finish()
+        self.assertEqual([line.rstrip('\n') for line in OutputReader(outer_experiment.curexpdir, 'stdout').lines()], expected_outer)
+        self.assertEqual([line.rstrip('\n') for line in OutputReader(inner_experiment.curexpdir, 'stdout').lines()], expected_inner)
+
+    def test_unrotated(self):
+        # The reader also handles the plain stdout file written when rotation is off
+        experiment = Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list)
+        expected = self.print_lines(10)
+        experiment.finish()
+        reader = OutputReader(experiment.curexpdir, 'stdout')
+        self.assertEqual(reader.segments, [os.path.join(experiment.curexpdir, 'stdout')])
+        self.assertEqual([line.rstrip('\n') for line in reader.tail(2)], expected[-2:])
+
+    def tearDown(self):
+        shutil.rmtree(self.experiments_folder_id)
+        pass
@@ -0,0 +1,81 @@
+import unittest
+from .training_utils import build_training_parser
+import subprocess
+from meticulous import Experiment
+from meticulous.experiment import MismatchedArgsException
+from meticulous.manifest import load_manifest
+from meticulous.output import OutputReader
+from meticulous.pack import pack_experiments
+import os
+import shutil
+import sys
+
+class PackTestCase(unittest.TestCase):
+    def setUp(self):
+        self.experiments_folder_id = os.path.join('temp_files', 'experiments_'+self.id())
+        self.original_args_list = ['--dry-run', '--epochs', '1', '--seed', '234']
+        self.meticulous_args_list = ['--experiments-directory', self.experiments_folder_id]
+        self.parser = build_training_parser()
+        self.args = vars(self.parser.parse_args(self.original_args_list))
+        Experiment.add_argument_group(self.parser)
+
+    def run_experiments(self):
+        """Leave behind experiments 1 and 3 finished with SUCCESS, 2 with ERROR and 4 still running"""
+        for i in range(1, 4):
+            try:
+                with Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list) as experiment:
+                    print('stdout redirection text {}'.format(i))
+                    experiment.summary({'val_loss': i/10})
+                    if i == 2:
+                        raise ValueError
+            except ValueError:
+                pass
+        return Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list)
+
+    def expdir(self, expid):
+        return os.path.join(self.experiments_folder_id, expid)
+
+    def test_pack(self):
+        running = self.run_experiments()
+        self.assertCountEqual(pack_experiments(self.experiments_folder_id), ['1', '2', '3'])
+        for expid in ['1', '2', '3']:
+            self.assertFalse(os.path.isdir(self.expdir(expid)))
+        # Packed experiments read back without unpacking them
+        manifest = load_manifest(self.expdir('2'))
+        self.assertDictEqual(manifest['args'], self.args)
+        self.assertEqual(manifest['status'], 'ERROR')
+        self.assertEqual(load_manifest(self.expdir('3'))['summary'], {'val_loss': 0.3})
+        self.assertEqual([line.strip() for line in OutputReader(self.expdir('1'), 'stdout').lines()], ['stdout redirection text 1'])
+        # Running experiments are left alone
+        self.assertTrue(os.path.isdir(self.expdir('4')))
+        running.finish()
+        self.assertCountEqual(pack_experiments(self.experiments_folder_id), ['4'])
+        self.assertEqual(load_manifest(self.expdir('4'))['status'], 'SUCCESS')
+
+    def test_new_ids(self):
+        self.run_experiments().finish()
+        pack_experiments(self.experiments_folder_id)
+        # Ids of packed experiments are never handed out again
+        experiment = Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list)
+        self.assertTrue(experiment.curexpdir.endswith("5"))
+        experiment.finish()
+
+    def test_resuming_packed_experiment(self):
+        self.run_experiments().finish()
+        pack_experiments(self.experiments_folder_id)
+        experiment = Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list+['--experiment-id', '1'])
+        self.assertTrue(experiment.curexpdir.endswith("1"))
+        experiment.finish()
+        with self.assertRaises(MismatchedArgsException):
+            Experiment.from_parser(self.parser, self.original_args_list+['--seed', '235']+self.meticulous_args_list+['--experiment-id', '3'])
+
+    def test_cli(self):
+        self.run_experiments().finish()
+        process = subprocess.run([sys.executable, '-m', 'meticulous.pack', self.experiments_folder_id])
+        self.assertEqual(process.returncode, 0)
+        self.assertEqual([entry for entry in os.listdir(self.experiments_folder_id) if entry.isdigit()], [])
+        self.assertEqual(load_manifest(self.expdir('4'))['status'], 'SUCCESS')
+
+    def tearDown(self):
+        shutil.rmtree(self.experiments_folder_id)
+        pass
@@ -0,0 +1,67 @@
+import unittest
+from .training_utils import build_training_parser
+import json
+import subprocess
+from meticulous import Experiment
+import os
+import pstats
+import shutil
+import time
+
+def busy_function(seconds=0.5):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(1000))
+    return total
+
+class ProfilingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.experiments_folder_id = os.path.join('temp_files', 'experiments_'+self.id())
+        self.original_args_list = ['--dry-run', '--epochs', '1']
+        self.meticulous_args_list = ['--experiments-directory', self.experiments_folder_id]
+        self.parser = build_training_parser()
+        Experiment.add_argument_group(self.parser)
+
+    def run_profiled(self, profile_args):
+        experiment = Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list+profile_args)
+        print('stdout redirection text')
+        busy_function()
+        experiment.finish()
+        return experiment.curexpdir
+
+    def test_cprofile(self):
+        expdir = self.run_profiled(['--profile', 'cprofile'])
+        stats = pstats.Stats(os.path.join(expdir, 'profile.pstats'))
+        self.assertIn('busy_function', [function for _, _, function in stats.stats])
+
+    def test_sampling(self):
+        expdir = self.run_profiled(['--profile', 'sampling'])
+        # Collapsed stacks, one per line followed by a sample count, as read by flame graph tools
+        with open(os.path.join(expdir, 'profile.folded'), 'r') as f:
+            stacks = dict(line.rsplit(' ', 1) for line in f.read().splitlines())
+        self.assertTrue(any('busy_function' in stack for stack in stacks))
+        self.assertTrue(all(count.strip().isdigit() for count in stacks.values()))
+
+    def test_memory(self):
+        expdir = self.run_profiled(['--profile', 'cprofile', '--profile-memory'])
+        with open(os.path.join(expdir, 'memory_profile.txt'), 'r') as f:
+            self.assertTrue(f.read().strip())
+
+    def test_overhead(self):
+        expdir = self.run_profiled(['--profile', 'cprofile'])
+        with open(os.path.join(expdir, 'meticulous_overhead.json'), 'r') as f:
+            overhead = json.load(f)
+        self.assertCountEqual(overhead.keys(), ['git', 'setup', 'tee', 'finalize'])
+        for seconds in overhead.values():
+            self.assertGreaterEqual(seconds, 0)
+        # The experiment body isn't counted as meticulous overhead
+        self.assertLess(sum(overhead.values()), 0.5)
+
+    def test_exception(self):
+        subprocess.run(['python', 'exit_testing_helper_exception.py', ]+self.original_args_list+self.meticulous_args_list+['--profile', 'cprofile'])
+        pstats.Stats(os.path.join(self.experiments_folder_id, '1', 'profile.pstats'))
+
+    def tearDown(self):
+        shutil.rmtree(self.experiments_folder_id)
+        pass
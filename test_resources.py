@@ -0,0 +1,62 @@
+import unittest
+from .training_utils import build_training_parser
+import subprocess
+import json
+from meticulous import Experiment
+from meticulous.resources import load_samples
+import os
+import shutil
+import sys
+import time
+
+class ResourceTelemetryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.experiments_folder_id = os.path.join('temp_files', 'experiments_'+self.id())
+        self.original_args_list = ['--dry-run', '--epochs', '1']
+        self.meticulous_args_list = ['--experiments-directory', self.experiments_folder_id]
+        self.sampling_args_list = ['--resource-sampling-interval', '0.05']
+        self.parser = build_training_parser()
+        Experiment.add_argument_group(self.parser)
+
+    def read_metadata(self, expdir):
+        with open(os.path.join(expdir, 'metadata.json'), 'r') as f:
+            return json.load(f)
+
+    def test_summary(self):
+        experiment = Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list+self.sampling_args_list)
+        block = b'x' * (200 * 1024 * 1024)
+        time.sleep(0.5)
+        del block
+        experiment.finish()
+        resources = self.read_metadata(experiment.curexpdir)['resources']
+        self.assertCountEqual(resources.keys(), ['cpu-time', 'peak-rss', 'max-open-fds', 'read-bytes', 'write-bytes'])
+        self.assertGreaterEqual(resources['peak-rss'], 200 * 1024 * 1024)
+        self.assertGreater(resources['max-open-fds'], 0)
+
+    def test_children(self):
+        experiment = Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list+self.sampling_args_list)
+        subprocess.run([sys.executable, '-c', 'import time\nend = time.process_time() + 1\nwhile time.process_time() < end: pass'])
+        experiment.finish()
+        # CPU time spent in child processes is included
+        self.assertGreaterEqual(self.read_metadata(experiment.curexpdir)['resources']['cpu-time'], 0.9)
+
+    def test_samples(self):
+        experiment = Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list+self.sampling_args_list)
+        time.sleep(1)
+        experiment.finish()
+        samples = load_samples(experiment.curexpdir)
+        self.assertCountEqual(samples.dtype.names, ['time', 'cpu_time', 'rss', 'open_fds', 'read_bytes', 'write_bytes'])
+        self.assertGreaterEqual(len(samples), 10)
+        self.assertTrue((samples['time'][1:] > samples['time'][:-1]).all())
+        # A fixed-size binary record per sample
+        self.assertEqual(os.path.getsize(os.path.join(experiment.curexpdir, 'resources.bin')) % samples.dtype.itemsize, 0)
+
+    def test_disabled_by_default(self):
+        experiment = Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list)
+        experiment.finish()
+        self.assertNotIn('resources', self.read_metadata(experiment.curexpdir))
+        self.assertFalse(os.path.exists(os.path.join(experiment.curexpdir, 'resources.bin')))
+
+    def tearDown(self):
+        shutil.rmtree(self.experiments_folder_id)
+        pass
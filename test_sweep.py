@@ -0,0 +1,69 @@
+import unittest
+from .training_utils import build_training_parser, main, main_failing_on_large_lr
+import json
+from meticulous import Experiment
+from meticulous.sweep import run_sweep, GridSearch, RandomSearch
+import itertools
+import os
+import shutil
+
+class SweepTestCase(unittest.TestCase):
+    def setUp(self):
+        self.experiments_folder_id = os.path.join('temp_files', 'experiments_'+self.id())
+        self.original_args_list = ['--dry-run', '--epochs', '1']
+        self.meticulous_args_list = ['--experiments-directory', self.experiments_folder_id]
+        self.parser = build_training_parser()
+        Experiment.add_argument_group(self.parser)
+
+    def read_experiment(self, expid):
+        expdir = os.path.join(self.experiments_folder_id, expid)
+        with open(os.path.join(expdir, 'args.json'), 'r') as f:
+            args = json.load(f)
+        with open(os.path.join(expdir, 'STATUS'), 'r') as f:
+            status = f.readlines()[0].strip()
+        with open(os.path.join(expdir, 'stdout'), 'r') as f:
+            stdout = f.read()
+        return args, status, stdout
+
+    def test_grid(self):
+        space = GridSearch({'lr': [0.1, 0.5], 'gamma': [0.7, 0.9], 'seed': [1, 2], 'batch-size': [32]})
+        results = run_sweep(self.parser, main, space, processes=4,
+                            arg_list=self.original_args_list+self.meticulous_args_list)
+        self.assertEqual(len(results), 8)
+        self.assertCountEqual([result['id'] for result in results], [str(i) for i in range(1, 9)])
+        points = set()
+        for result in results:
+            args, status, _ = self.read_experiment(result['id'])
+            self.assertEqual(status, 'SUCCESS')
+            self.assertEqual(result['status'], 'SUCCESS')
+            self.assertTrue(args['dry_run'])
+            self.assertEqual(args['batch_size'], 32)
+            points.add((args['lr'], args['gamma'], args['seed']))
+        self.assertEqual(points, set(itertools.product([0.1, 0.5], [0.7, 0.9], [1, 2])))
+
+    def test_random(self):
+        space = RandomSearch({'lr': (0.01, 1.0), 'gamma': [0.5, 0.7, 0.9]}, n_samples=6, seed=0)
+        results = run_sweep(self.parser, main, space, processes=3,
+                            arg_list=self.original_args_list+self.meticulous_args_list)
+        self.assertEqual(len(results), 6)
+        for result in results:
+            args, status, _ = self.read_experiment(result['id'])
+            self.assertEqual(status, 'SUCCESS')
+            self.assertTrue(0.01 <= args['lr'] <= 1.0)
+            self.assertIn(args['gamma'], [0.5, 0.7, 0.9])
+
+    def test_failures(self):
+        space = GridSearch({'lr': [0.1, 0.2, 0.6, 0.7, 0.3]})
+        results = run_sweep(self.parser, main_failing_on_large_lr, space, processes=2,
+                            arg_list=self.original_args_list+self.meticulous_args_list)
+        # A failed point doesn't stop the rest of the sweep
+        self.assertEqual(len(results), 5)
+        for result in results:
+            args, status, stdout = self.read_experiment(result['id'])
+            self.assertEqual(stdout.strip(), 'lr {}'.format(args['lr']), msg="Error with stdout redirection")
+            self.assertEqual(status, 'ERROR' if args['lr'] >= 0.5 else 'SUCCESS')
+            self.assertEqual(result['status'], status)
+
+    def tearDown(self):
+        shutil.rmtree(self.experiments_folder_id)
+        pass
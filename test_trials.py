@@ -0,0 +1,65 @@
+import unittest
+from .training_utils import build_training_parser
+from meticulous import Experiment
+from meticulous.trials import load_trials
+import os
+import shutil
+import time
+
+class TrialTestCase(unittest.TestCase):
+    def setUp(self):
+        self.experiments_folder_id = os.path.join('temp_files', 'experiments_'+self.id())
+        self.original_args_list = ['--dry-run', '--epochs', '1']
+        self.meticulous_args_list = ['--experiments-directory', self.experiments_folder_id]
+        self.parser = build_training_parser()
+        Experiment.add_argument_group(self.parser)
+
+    def test_trials(self):
+        with Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list) as parent:
+            for i, lr in enumerate([0.1, 0.2, 0.3]):
+                with parent.trial(lr=lr, gamma=0.5) as trial:
+                    print('lr {}'.format(lr))
+                    trial.summary({'val_loss': lr*2})
+                    self.assertEqual(trial.id, i)
+        # Trials live inside the parent experiment rather than getting folders of their own
+        self.assertEqual([entry for entry in os.listdir(self.experiments_folder_id) if entry.isdigit()], ['1'])
+        trials = load_trials(parent.curexpdir)
+        self.assertEqual([trial['id'] for trial in trials], [0, 1, 2])
+        self.assertEqual([trial['args'] for trial in trials], [{'lr': lr, 'gamma': 0.5} for lr in [0.1, 0.2, 0.3]])
+        self.assertEqual([trial['summary'] for trial in trials], [{'val_loss': lr*2} for lr in [0.1, 0.2, 0.3]])
+        self.assertEqual({trial['status'] for trial in trials}, {'SUCCESS'})
+        with open(os.path.join(parent.curexpdir, 'stdout'), 'r') as f:
+            self.assertEqual([line.strip() for line in f.readlines()],
+                             ['[trial 0] lr 0.1', '[trial 1] lr 0.2', '[trial 2] lr 0.3'])
+
+    def test_failed_trial(self):
+        with Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list) as parent:
+            with self.assertRaises(ValueError):
+                with parent.trial(lr=1.0) as trial:
+                    raise ValueError
+            with parent.trial(lr=0.1) as trial:
+                trial.summary({'val_loss': 0.2})
+        trials = load_trials(parent.curexpdir)
+        self.assertEqual([trial['status'] for trial in trials], ['ERROR', 'SUCCESS'])
+        with open(os.path.join(parent.curexpdir, 'STATUS'), 'r') as f:
+            self.assertEqual(f.readlines()[0].strip(), 'SUCCESS')
+
+    def test_compact_trials(self):
+        with Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list) as parent:
+            with parent.trial(lr=0.1) as trial:
+                self.assertFalse(hasattr(trial, '__dict__'), msg="Trials should use __slots__")
+
+    def test_throughput(self):
+        # 10k trials a minute
+        n_trials = 2000
+        start = time.perf_counter()
+        with Experiment.from_parser(self.parser, self.original_args_list+self.meticulous_args_list) as parent:
+            for i in range(n_trials):
+                with parent.trial(lr=i/n_trials, seed=i) as trial:
+                    trial.summary({'val_loss': i})
+        self.assertLess(time.perf_counter() - start, n_trials*60/10000)
+        self.assertEqual(len(load_trials(parent.curexpdir)), n_trials)
+
+    def tearDown(self):
+        shutil.rmtree(self.experiments_folder_id)
+        pass
@@ -43,6 +43,17 @@ def main():
     experiment = Experiment.from_parser(parser)
     experiment.summary({'val_loss': random.random()})
 
+def main_failing_on_large_lr():
+    # Like main, but prints its learning rate and diverges for lr >= 0.5
+    parser = build_training_parser()
+    Experiment.add_argument_group(parser)
+    experiment = Experiment.from_parser(parser)
+    args = parser.parse_args()
+    print('lr', args.lr)
+    if args.lr >= 0.5:
+        raise ValueError('Training diverged')
+    experiment.summary({'val_loss': args.lr})
+
 
 
 if __name__ == '__main__':